@@ -4,7 +4,6 @@ Streamlit + Supabase 기반
 """
 
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 import bcrypt
 from supabase import create_client, Client
@@ -45,6 +44,8 @@ if 'user' not in st.session_state:
     st.session_state.user = None
 if 'role' not in st.session_state:
     st.session_state.role = None
+if 'can_modify_flag' not in st.session_state:
+    st.session_state.can_modify_flag = False
 
 # ============================================
 # 인증 함수
@@ -53,17 +54,19 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """비밀번호 검증"""
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
-def hash_password(password: str) -> str:
-    """비밀번호 해시화"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+def _fetch_user(username: str):
+    """활성 사용자 조회 (계정 비활성화/비밀번호 변경이 즉시 반영되도록 캐시하지 않음)"""
+    response = supabase.table('users').select(
+        'id, username, password_hash, role, full_name, can_modify'
+    ).eq('username', username).eq('is_active', True).limit(1).maybe_single().execute()
+    return response.data if response else None
 
 def login(username: str, password: str) -> tuple:
     """로그인 처리"""
     try:
-        response = supabase.table('users').select('*').eq('username', username).eq('is_active', True).execute()
+        user = _fetch_user(username)
         
-        if response.data and len(response.data) > 0:
-            user = response.data[0]
+        if user:
             if verify_password(password, user['password_hash']):
                 return True, user
         return False, None
@@ -76,15 +79,12 @@ def logout():
     st.session_state.authenticated = False
     st.session_state.user = None
     st.session_state.role = None
+    st.session_state.can_modify_flag = False
     st.rerun()
 
 def can_modify():
-    """수정 권한 확인"""
-    if st.session_state.role == 'admin':
-        return True
-    if st.session_state.user and st.session_state.user.get('can_modify', False):
-        return True
-    return False
+    """수정 권한 확인 (로그인 시 계산된 값 사용)"""
+    return st.session_state.get('can_modify_flag', False)
 
 # ============================================
 # 로그인 화면
@@ -109,6 +109,7 @@ def show_login_page():
                         st.session_state.authenticated = True
                         st.session_state.user = user
                         st.session_state.role = user['role']
+                        st.session_state.can_modify_flag = user['role'] == 'admin' or bool(user.get('can_modify'))
                         st.success(f"✅ {user['full_name']}님, 환영합니다!")
                         st.rerun()
                     else:
@@ -127,11 +128,15 @@ def show_login_page():
 
 
 # ============================================
-# 모듈 임포트
+# 모듈 임포트 (로그인 후 워커당 1회)
 # ============================================
-from modules_students import show_dashboard, show_student_management
-from modules_ocr_schedule import show_ocr_module, show_smart_schedule
-from modules_users import show_user_management
+@st.cache_resource
+def load_modules():
+    """기능 모듈 지연 로드 (로그인 화면에서는 pandas 등 무거운 모듈을 불러오지 않음)"""
+    import modules_students
+    import modules_ocr_schedule
+    import modules_users
+    return modules_students, modules_ocr_schedule, modules_users
 
 # ============================================
 # 메인 애플리케이션
@@ -143,17 +148,13 @@ def main():
         show_login_page()
         return
     
+    modules_students, modules_ocr_schedule, modules_users = load_modules()
+    
     with st.sidebar:
         st.markdown(f"### 👋 {st.session_state.user['full_name']}님")
         st.markdown(f"**역할:** {'🔑 관리자' if st.session_state.role == 'admin' else '👤 직원'}")
         
-        can_modify_status = False
-        if st.session_state.role == 'admin':
-            can_modify_status = True
-        elif st.session_state.user and st.session_state.user.get('can_modify', False):
-            can_modify_status = True
-        
-        st.markdown(f"**권한:** {'✏️ 수정 가능' if can_modify_status else '👁️ 조회 전용'}")
+        st.markdown(f"**권한:** {'✏️ 수정 가능' if can_modify() else '👁️ 조회 전용'}")
         st.markdown("---")
         
         menu_options = ["📊 대시보드", "👥 학생 관리", "📄 OCR 처리", "📅 스마트 시간표"]
@@ -168,15 +169,15 @@ def main():
             logout()
     
     if menu == "📊 대시보드":
-        show_dashboard(supabase)
+        modules_students.show_dashboard(supabase)
     elif menu == "👥 학생 관리":
-        show_student_management(supabase)
+        modules_students.show_student_management(supabase)
     elif menu == "📄 OCR 처리":
-        show_ocr_module(supabase)
+        modules_ocr_schedule.show_ocr_module(supabase)
     elif menu == "📅 스마트 시간표":
-        show_smart_schedule(supabase)
+        modules_ocr_schedule.show_smart_schedule(supabase)
     elif menu == "👤 사용자 관리":
-        show_user_management(supabase)
+        modules_users.show_user_management(supabase)
 
 if __name__ == "__main__":
     main()
@@ -3,30 +3,151 @@ OCR 및 스마트 스케줄 모듈 (OpenAI Vision API 사용)
 """
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import datetime
 import base64
+import io
 import json
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps
+
+# 학년 선택지
+_GRADES = ("초1", "초2", "초3", "초4", "초5", "초6")
+_GRADE_IDX = {g: i for i, g in enumerate(_GRADES)}
+
+# OpenAI Vision 전송용 이미지 설정
+# - 기본: 긴 변 1600px JPEG(q85)로 축소 후 detail=low 전송 (보통 수백 KB 이하)
+# - 고해상도: 원본 그대로 detail=high 전송, 단 8MB 초과 원본은 축소 경로로 강제
+#   (base64 인코딩 시 약 1.33배로 커지므로 메모리/업로드 시간 상한)
+OCR_MAX_EDGE = 1600
+OCR_JPEG_QUALITY = 85
+OCR_MAX_UPLOAD_BYTES = 8 * 1024 * 1024
+
+# OCR 백그라운드 작업 진행 상황 갱신 주기 (초)
+OCR_POLL_INTERVAL = 0.5
+
+# 시간표 뷰 최대 조회 행 수 (요일 7 × 시간대)
+SCHEDULE_ROW_LIMIT = 500
+
+# OCR 처리 이력 페이지 크기
+OCR_HISTORY_PAGE_SIZE = 10
 
 
 def can_modify():
-    """수정 권한 확인"""
-    if st.session_state.role == 'admin':
-        return True
-    if st.session_state.user and st.session_state.user.get('can_modify', False):
-        return True
-    return False
+    """수정 권한 확인 (로그인 시 계산된 값 사용)"""
+    return st.session_state.get('can_modify_flag', False)
 
 
-def process_ocr_with_openai(image_file, openai_api_key):
-    """OpenAI Vision API를 사용한 OCR 처리"""
-    try:
-        import requests
+@st.cache_data(ttl=30, show_spinner=False)
+def _load_smart_schedule(_supabase):
+    """smart_schedule 뷰 조회 (30초 캐시)"""
+    return _supabase.table('smart_schedule').select(
+        'day_of_week, time_slot, applicant_count, should_highlight, student_names'
+    ).limit(SCHEDULE_ROW_LIMIT).execute().data
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _load_slot(_supabase, sel_day, sel_time):
+    """시간대 요약 + 가용 학생 목록 조회 (단일 RPC, 30초 캐시)"""
+    return _supabase.rpc('get_slot_with_students', {
+        'p_day': sel_day,
+        'p_time': sel_time
+    }).execute().data or {}
+
+
+def clear_schedule_cache():
+    """학생 데이터 변경 후 시간표 캐시 초기화"""
+    _load_smart_schedule.clear()
+    _load_slot.clear()
+
+
+@st.cache_resource
+def _openai_session():
+    """OpenAI API 호출용 세션 (keep-alive 연결 재사용)"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=10,
+        max_retries=Retry(total=2, backoff_factor=0.5)
+    ))
+    session.headers.update({'Connection': 'keep-alive'})
+    return session
+
+
+@st.cache_resource
+def _ocr_executor():
+    """OCR API 호출용 백그라운드 스레드 풀"""
+    return ThreadPoolExecutor(max_workers=4)
+
+
+def _load_ocr_history(supabase, before=None, through=None):
+    """OCR 처리 이력 조회 ((created_at, id) 키셋 페이지네이션)
+    
+    before: 이 (created_at, id) 보다 오래된 다음 페이지
+    through: 최신 행부터 이 (created_at, id) 까지 전체 (새 행이 추가되어도 누락 없음)
+    """
+    # created_at이 같은 행도 순서가 정해지도록 id를 보조 정렬 키로 사용
+    # (order()를 두 번 호출하면 order 파라미터가 중복되므로 정렬 문자열 전체를 한 번에 지정)
+    query = supabase.table('ocr_applications').select(
+        'id, review_status, reviewed_at, created_at'
+    ).order('created_at.desc,id.desc')
+    if before:
+        created_at, row_id = before
+        query = query.or_(
+            f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt."{row_id}")'
+        ).limit(OCR_HISTORY_PAGE_SIZE)
+    elif through:
+        created_at, row_id = through
+        query = query.or_(
+            f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gte."{row_id}")'
+        )
+    else:
+        query = query.limit(OCR_HISTORY_PAGE_SIZE)
+    return query.execute().data
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_ocr_image(image_bytes):
+    """업로드 이미지를 디코딩하여 EXIF 회전 보정 후 축소 (미리보기/OCR 공용, 업로드 내용 기준 캐시)"""
+    img = ImageOps.exif_transpose(Image.open(io.BytesIO(image_bytes)))
+    img.thumbnail((OCR_MAX_EDGE, OCR_MAX_EDGE), Image.LANCZOS)
+    return img
+
+
+def encode_ocr_image(img):
+    """PIL 이미지를 JPEG base64로 인코딩"""
+    buf = io.BytesIO()
+    img.convert("RGB").save(buf, "JPEG", quality=OCR_JPEG_QUALITY, optimize=True)
+    return base64.b64encode(buf.getvalue()).decode('utf-8')
+
+
+def _read_openai_stream(response, progress=None):
+    """SSE 스트리밍 응답에서 delta.content를 누적 (progress['text']에 진행 상황 기록)"""
+    content = ''
+    for raw_line in response.iter_lines():
+        line = raw_line.decode('utf-8')
+        if not line.startswith('data: '):
+            continue
         
-        # 이미지를 base64로 인코딩
-        image_bytes = image_file.read()
-        image_file.seek(0)  # 파일 포인터 리셋
-        base64_image = base64.b64encode(image_bytes).decode('utf-8')
+        data = line[len('data: '):]
+        if data == '[DONE]':
+            break
         
+        choices = json.loads(data).get('choices')
+        if choices:
+            content += choices[0].get('delta', {}).get('content') or ''
+            if progress is not None:
+                progress['text'] = content
+    return content
+
+
+def process_ocr_with_openai(session, base64_image, openai_api_key, high_res=False, progress=None):
+    """OpenAI Vision API를 사용한 OCR 처리 (스트리밍, 워커 스레드에서 실행되므로 st.* 호출 금지)"""
+    try:
         # OpenAI Vision API 호출
         headers = {
             "Content-Type": "application/json",
@@ -64,45 +185,64 @@ JSON 형식으로 응답해주세요:
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
+                                "url": f"data:image/jpeg;base64,{base64_image}",
+                                "detail": "high" if high_res else "low"
                             }
                         }
                     ]
                 }
             ],
-            "max_tokens": 1000
+            "max_tokens": 1000,
+            "stream": True
         }
         
-        response = requests.post(
+        with session.post(
             "https://api.openai.com/v1/chat/completions",
             headers=headers,
             json=payload,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            content = result['choices'][0]['message']['content']
+            timeout=30,
+            stream=True
+        ) as response:
+            if response.status_code != 200:
+                return False, None, f"API 오류: {response.status_code} - {response.text}"
             
-            # JSON 파싱
-            try:
-                # 코드 블록 제거
-                if '```json' in content:
-                    content = content.split('```json')[1].split('```')[0].strip()
-                elif '```' in content:
-                    content = content.split('```')[1].split('```')[0].strip()
-                
-                ocr_data = json.loads(content)
-                return True, ocr_data, content
-            except json.JSONDecodeError:
-                return True, {}, content
-        else:
-            return False, None, f"API 오류: {response.status_code} - {response.text}"
+            content = _read_openai_stream(response, progress)
+        
+        # JSON 파싱
+        try:
+            # 코드 블록 제거
+            if '```json' in content:
+                content = content.split('```json')[1].split('```')[0].strip()
+            elif '```' in content:
+                content = content.split('```')[1].split('```')[0].strip()
             
+            ocr_data = json.loads(content)
+            return True, ocr_data, content
+        except json.JSONDecodeError:
+            return True, {}, content
+        
     except Exception as e:
         return False, None, str(e)
 
 
+@st.fragment(run_every=OCR_POLL_INTERVAL)
+def _ocr_progress_fragment():
+    """OCR 분석 진행 상황 (이 영역만 주기적으로 재실행, 완료 시 전체 재실행)"""
+    ocr_future = st.session_state.ocr_future
+    if ocr_future is None:
+        return
+    if ocr_future.done():
+        st.rerun()
+    
+    with st.status("AI가 이미지를 분석하고 있습니다... (10~20초)"):
+        # 워커 스레드가 스트리밍으로 받은 내용을 누적 표시
+        partial_text = st.session_state.ocr_progress['text']
+        if partial_text:
+            st.code(partial_text, language='json')
+        else:
+            st.write("🤖 OpenAI Vision API 응답 대기 중...")
+
+
 def show_ocr_module(supabase):
     """OCR 처리 페이지 (OpenAI Vision API 사용)"""
     st.title("📄 수기 원서 OCR 처리")
@@ -136,116 +276,262 @@ def show_ocr_module(supabase):
         help="AI가 학생 정보, 파란색 메모 등을 자동으로 인식합니다."
     )
     
+    ocr_image = None
     if uploaded_file is not None:
+        try:
+            ocr_image = load_ocr_image(uploaded_file.getvalue())
+        except Exception as e:
+            st.error(f"❌ 이미지를 읽을 수 없습니다: {e}")
+    
+    if ocr_image is not None:
         col1, col2 = st.columns(2)
         
         with col1:
             st.subheader("📷 원본 이미지")
-            st.image(uploaded_file, use_column_width=True)
+            st.image(ocr_image, use_column_width=True)
         
         with col2:
             st.subheader("🤖 AI 분석 결과")
             
-            if st.button("🚀 AI 분석 실행", type="primary", use_container_width=True):
-                with st.spinner("AI가 이미지를 분석하고 있습니다... (10~20초)"):
-                    success, ocr_data, raw_text = process_ocr_with_openai(uploaded_file, openai_api_key)
+            high_res = st.checkbox(
+                "고해상도",
+                value=False,
+                help="글씨가 작거나 흐린 경우 원본 해상도로 분석합니다. (느리고 비용이 더 듭니다)"
+            )
+            
+            if uploaded_file.size > OCR_MAX_UPLOAD_BYTES:
+                st.warning("⚠️ 이미지가 큽니다 — 자동 리사이즈합니다.")
+                high_res = False
+            
+            # 새 이미지가 업로드되면 이전 분석 결과 초기화
+            upload_key = uploaded_file.file_id
+            if st.session_state.get('ocr_upload_key') != upload_key:
+                st.session_state.ocr_upload_key = upload_key
+                st.session_state.ocr_future = None
+                st.session_state.ocr_result = None
+            
+            # 백그라운드 작업이 끝났으면 결과 반영
+            ocr_future = st.session_state.ocr_future
+            if ocr_future is not None and ocr_future.done():
+                st.session_state.ocr_result = ocr_future.result()
+                st.session_state.ocr_future = None
+            
+            if st.button(
+                "🚀 AI 분석 실행",
+                type="primary",
+                use_container_width=True,
+                disabled=st.session_state.ocr_future is not None
+            ):
+                # 고해상도 모드에서만 원본 전송
+                if high_res:
+                    base64_image = base64.b64encode(uploaded_file.getvalue()).decode('utf-8')
+                else:
+                    base64_image = encode_ocr_image(ocr_image)
+                st.session_state.ocr_progress = {'text': ''}
+                st.session_state.ocr_future = _ocr_executor().submit(
+                    process_ocr_with_openai, _openai_session(), base64_image, openai_api_key, high_res,
+                    st.session_state.ocr_progress
+                )
+                st.session_state.ocr_result = None
+                st.rerun()  # 분석 중에는 버튼을 비활성화하여 다시 그림
+            
+            if st.session_state.ocr_future is not None:
+                _ocr_progress_fragment()
+            
+            if st.session_state.ocr_result is not None:
+                success, ocr_data, raw_text = st.session_state.ocr_result
+                
+                if success:
+                    st.success("✅ AI 분석 완료!")
                     
-                    if success:
-                        st.success("✅ AI 분석 완료!")
+                    # 원본 응답 표시
+                    with st.expander("📄 AI 원본 응답"):
+                        st.text_area("Raw Response", raw_text, height=200)
+                    
+                    st.markdown("---")
+                    st.subheader("✏️ AI 분석 결과 검수 및 수정")
+                    
+                    with st.form("ocr_review_form"):
+                        review_name = st.text_input("학생명", value=ocr_data.get('name', ''))
+                        review_grade = st.selectbox(
+                            "학년", 
+                            _GRADES,
+                            index=_GRADE_IDX.get(ocr_data.get('grade'), 0)
+                        )
+                        review_phone = st.text_input("학부모 연락처", value=ocr_data.get('parent_phone', ''))
+                        review_reading = st.text_area("독서 습관", value=ocr_data.get('reading_habit', ''), height=100)
+                        review_notes = st.text_area("특이사항", value=ocr_data.get('special_notes', ''), height=100)
+                        review_blue = st.text_area("파란색 메모", value=ocr_data.get('blue_notes', ''), height=100)
                         
-                        # 원본 응답 표시
-                        with st.expander("📄 AI 원본 응답"):
-                            st.text_area("Raw Response", raw_text, height=200)
+                        # 희망 시간대
+                        preferred_times = ocr_data.get('preferred_times', [])
+                        if preferred_times:
+                            st.info(f"🕐 희망 시간대: {', '.join(preferred_times)}")
                         
-                        st.markdown("---")
-                        st.subheader("✏️ AI 분석 결과 검수 및 수정")
+                        col_btn1, col_btn2 = st.columns(2)
+                        with col_btn1:
+                            approve = st.form_submit_button("✅ 승인 및 저장", type="primary", use_container_width=True)
+                        with col_btn2:
+                            reject = st.form_submit_button("❌ 거부", use_container_width=True)
                         
-                        with st.form("ocr_review_form"):
-                            review_name = st.text_input("학생명", value=ocr_data.get('name', ''))
-                            review_grade = st.selectbox(
-                                "학년", 
-                                ["초1", "초2", "초3", "초4", "초5", "초6"],
-                                index=["초1", "초2", "초3", "초4", "초5", "초6"].index(ocr_data.get('grade', '초1')) if ocr_data.get('grade') in ["초1", "초2", "초3", "초4", "초5", "초6"] else 0
-                            )
-                            review_phone = st.text_input("학부모 연락처", value=ocr_data.get('parent_phone', ''))
-                            review_reading = st.text_area("독서 습관", value=ocr_data.get('reading_habit', ''), height=100)
-                            review_notes = st.text_area("특이사항", value=ocr_data.get('special_notes', ''), height=100)
-                            review_blue = st.text_area("파란색 메모", value=ocr_data.get('blue_notes', ''), height=100)
-                            
-                            # 희망 시간대
-                            preferred_times = ocr_data.get('preferred_times', [])
-                            if preferred_times:
-                                st.info(f"🕐 희망 시간대: {', '.join(preferred_times)}")
+                        if approve:
+                            ocr_record = {
+                                'image_url': f"upload_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uploaded_file.name}",
+                                'ocr_raw_text': raw_text,
+                                'ocr_structured_data': {
+                                    'name': review_name,
+                                    'grade': review_grade,
+                                    'parent_phone': review_phone,
+                                    'reading_habit': review_reading,
+                                    'preferred_times': preferred_times
+                                },
+                                'blue_text_notes': review_blue,
+                                'review_status': 'approved',
+                                'reviewed_by': st.session_state.user['id'],
+                                'reviewed_at': datetime.now().isoformat()
+                            }
                             
-                            col_btn1, col_btn2 = st.columns(2)
-                            with col_btn1:
-                                approve = st.form_submit_button("✅ 승인 및 저장", type="primary", use_container_width=True)
-                            with col_btn2:
-                                reject = st.form_submit_button("❌ 거부", use_container_width=True)
+                            student_data = {
+                                'name': review_name,
+                                'grade': review_grade,
+                                'parent_phone': review_phone,
+                                'reading_habit': review_reading,
+                                'special_notes': f"{review_notes}\n\n[파란색 메모] {review_blue}" if review_blue else review_notes,
+                                'created_by': st.session_state.user['id']
+                            }
                             
-                            if approve:
-                                ocr_record = {
-                                    'image_url': f"upload_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uploaded_file.name}",
-                                    'ocr_raw_text': raw_text,
-                                    'ocr_structured_data': {
-                                        'name': review_name,
-                                        'grade': review_grade,
-                                        'parent_phone': review_phone,
-                                        'reading_habit': review_reading,
-                                        'preferred_times': preferred_times
-                                    },
-                                    'blue_text_notes': review_blue,
-                                    'review_status': 'approved',
-                                    'reviewed_by': st.session_state.user['id'],
-                                    'reviewed_at': datetime.now().isoformat()
-                                }
+                            try:
+                                # 원서 기록과 학생 등록을 한 번의 RPC로 처리 (supabase_functions.sql 참고)
+                                supabase.rpc('approve_ocr_application', {
+                                    'p_ocr': ocr_record,
+                                    'p_student': student_data
+                                }).execute()
+                                clear_schedule_cache()
+                                st.session_state.pop('ocr_cursor', None)  # 이력 페이지네이션 초기화
+                                st.session_state.ocr_result = None
                                 
-                                try:
-                                    ocr_response = supabase.table('ocr_applications').insert(ocr_record).execute()
-                                    
-                                    student_data = {
-                                        'name': review_name,
-                                        'grade': review_grade,
-                                        'parent_phone': review_phone,
-                                        'reading_habit': review_reading,
-                                        'special_notes': f"{review_notes}\n\n[파란색 메모] {review_blue}" if review_blue else review_notes,
-                                        'created_by': st.session_state.user['id']
-                                    }
-                                    
-                                    student_response = supabase.table('students').insert(student_data).execute()
-                                    
-                                    st.success("✅ OCR 데이터가 승인되고 학생이 등록되었습니다!")
-                                    st.balloons()
-                                    st.rerun()
-                                except Exception as e:
-                                    st.error(f"❌ 저장 오류: {e}")
-                            
-                            if reject:
-                                st.warning("❌ AI 분석 결과가 거부되었습니다.")
+                                st.success("✅ OCR 데이터가 승인되고 학생이 등록되었습니다!")
+                                st.balloons()
                                 st.rerun()
-                    else:
-                        st.error(f"❌ AI 분석 실패: {raw_text}")
-                        st.info("💡 OpenAI API 키를 확인해주세요.")
-    
+                            except Exception as e:
+                                st.error(f"❌ 저장 오류: {e}")
+                        
+                        if reject:
+                            st.warning("❌ AI 분석 결과가 거부되었습니다.")
+                            st.session_state.ocr_result = None
+                            st.rerun()
+                else:
+                    st.error(f"❌ AI 분석 실패: {raw_text}")
+                    st.info("💡 OpenAI API 키를 확인해주세요.")
+
     st.markdown("---")
     st.subheader("📋 OCR 처리 이력")
     
     try:
-        ocr_history = supabase.table('ocr_applications').select('*').order('created_at', desc=True).limit(10).execute()
+        if 'ocr_cursor' not in st.session_state:
+            st.session_state.ocr_cursor = None
+            st.session_state.ocr_has_more = True
         
-        if ocr_history.data:
-            df = pd.DataFrame(ocr_history.data)
+        # 커서가 없으면 첫 페이지만, 있으면 최신 행부터 커서 행까지 다시 조회
+        cursor = st.session_state.ocr_cursor
+        history = _load_ocr_history(supabase, through=cursor)
+        has_more = st.session_state.ocr_has_more if cursor else len(history) == OCR_HISTORY_PAGE_SIZE
+        
+        if history:
+            df = pd.DataFrame(history)
             st.dataframe(
                 df[['id', 'review_status', 'reviewed_at', 'created_at']],
                 use_container_width=True,
                 hide_index=True
             )
+            
+            if has_more and st.button("더 보기", key="ocr_history_more_btn"):
+                last = history[-1]
+                more = _load_ocr_history(supabase, before=(last['created_at'], last['id']))
+                last = more[-1] if more else last
+                st.session_state.ocr_cursor = (last['created_at'], last['id'])
+                st.session_state.ocr_has_more = len(more) == OCR_HISTORY_PAGE_SIZE
+                st.rerun()
         else:
             st.info("OCR 처리 이력이 없습니다.")
     except Exception as e:
         st.error(f"데이터 로드 오류: {e}")
 
 
+@st.fragment
+def _schedule_fragment(supabase, df):
+    """요일/시간대 필터 및 학생 상세 목록 (위젯 변경 시 이 영역만 재실행)"""
+    try:
+        selected_day = st.selectbox(
+            "요일 선택",
+            ["전체", "월", "화", "수", "목", "금", "토", "일"]
+        )
+        
+        if selected_day != "전체":
+            df_filtered = df[df['day_of_week'] == selected_day]
+        else:
+            df_filtered = df
+        
+        df_filtered = df_filtered.copy()
+        df_filtered['강조'] = np.where(df_filtered['should_highlight'].eq(True), '⭐', '')
+        
+        display_df = df_filtered[['day_of_week', 'time_slot', 'applicant_count', '강조', 'student_names']].copy()
+        display_df.columns = ['요일', '시간대', '신청 인원', '개설 추천', '학생 목록']
+        
+        def highlight_rows(row):
+            if row['개설 추천'] == '⭐':
+                return ['background-color: #FEF3C7'] * len(row)
+            return [''] * len(row)
+        
+        styled_df = display_df.style.apply(highlight_rows, axis=1)
+        st.dataframe(styled_df, use_container_width=True, hide_index=True)
+        
+        st.markdown("---")
+        st.subheader("🔍 시간대별 학생 상세 목록")
+        
+        time_slots = (
+            df_filtered['day_of_week'] + ' ' + df_filtered['time_slot'].astype(str)
+            + ' (' + df_filtered['applicant_count'].astype(str) + '명)'
+        ).tolist()
+        
+        selected_slot = st.selectbox("시간대 선택", time_slots)
+        
+        if selected_slot:
+            parts = selected_slot.split()
+            sel_day = parts[0]
+            sel_time = parts[1]
+            
+            slot_data = _load_slot(supabase, sel_day, sel_time)
+            slot_summary = slot_data.get('summary') or {}
+            students_data = slot_data.get('students') or []
+            
+            if students_data:
+                st.success(f"📋 {sel_day} {sel_time} 시간대 가용 학생 목록 (신청 {slot_summary.get('applicant_count', len(students_data))}명)")
+                
+                # 우선순위점수 내림차순 정렬은 서버에서 처리됨
+                raw_df = pd.json_normalize(students_data, sep='_')
+                student_df = pd.DataFrame({
+                    '이름': raw_df['students_name'],
+                    '학년': raw_df['students_grade'],
+                    '입금상태': raw_df['students_payment_status'],
+                    '기존생': np.where(raw_df['students_is_existing_student'].eq(True), '✓', ''),
+                    '형제': np.where(raw_df['students_has_sibling'].eq(True), '✓', ''),
+                    '우선순위점수': raw_df['priority_score'],
+                    '시간우선순위': raw_df['priority']
+                })
+                student_df['배정순번'] = range(1, len(student_df) + 1)
+                
+                st.dataframe(
+                    student_df[['배정순번', '이름', '학년', '입금상태', '기존생', '형제', '우선순위점수']],
+                    use_container_width=True,
+                    hide_index=True
+                )
+            else:
+                st.info("해당 시간대에 신청한 학생이 없습니다.")
+    except Exception as e:
+        st.error(f"데이터 로드 오류: {e}")
+
+
 def show_smart_schedule(supabase):
     """스마트 시간표 페이지"""
     st.title("📅 스마트 시간표 스케줄링")
@@ -258,97 +544,14 @@ def show_smart_schedule(supabase):
     """)
     
     try:
-        schedule_view = supabase.table('smart_schedule').select('*').execute()
+        schedule_data = _load_smart_schedule(supabase)
         
-        if schedule_view.data:
-            df = pd.DataFrame(schedule_view.data)
+        if schedule_data:
+            df = pd.DataFrame(schedule_data)
             
             st.subheader("📊 시간대별 신청 현황")
             
-            selected_day = st.selectbox(
-                "요일 선택",
-                ["전체", "월", "화", "수", "목", "금", "토", "일"]
-            )
-            
-            if selected_day != "전체":
-                df_filtered = df[df['day_of_week'] == selected_day]
-            else:
-                df_filtered = df
-            
-            df_filtered['강조'] = df_filtered['should_highlight'].apply(lambda x: '⭐' if x else '')
-            
-            display_df = df_filtered[['day_of_week', 'time_slot', 'applicant_count', '강조', 'student_names']].copy()
-            display_df.columns = ['요일', '시간대', '신청 인원', '개설 추천', '학생 목록']
-            
-            def highlight_rows(row):
-                if row['개설 추천'] == '⭐':
-                    return ['background-color: #FEF3C7'] * len(row)
-                return [''] * len(row)
-            
-            styled_df = display_df.style.apply(highlight_rows, axis=1)
-            st.dataframe(styled_df, use_container_width=True, hide_index=True)
-            
-            st.markdown("---")
-            st.subheader("🔍 시간대별 학생 상세 목록")
-            
-            time_slots = df_filtered[['day_of_week', 'time_slot', 'applicant_count']].apply(
-                lambda x: f"{x['day_of_week']} {x['time_slot']} ({x['applicant_count']}명)", axis=1
-            ).tolist()
-            
-            selected_slot = st.selectbox("시간대 선택", time_slots)
-            
-            if selected_slot:
-                parts = selected_slot.split()
-                sel_day = parts[0]
-                sel_time = parts[1]
-                
-                students_query = supabase.table('available_times').select(
-                    'student_id, priority, students(name, grade, payment_status, payment_date, is_existing_student, has_sibling)'
-                ).eq('day_of_week', sel_day).eq('time_slot', sel_time).execute()
-                
-                if students_query.data:
-                    st.success(f"📋 {sel_day} {sel_time} 시간대 가용 학생 목록")
-                    
-                    student_list = []
-                    for item in students_query.data:
-                        student = item['students']
-                        priority_score = 0
-                        
-                        if student['payment_status'] == 'paid':
-                            priority_score += 1000000
-                            
-                            if student['payment_date']:
-                                from datetime import datetime
-                                payment_time = datetime.fromisoformat(student['payment_date'].replace('Z', '+00:00'))
-                                priority_score += (10000 - int((datetime.now(payment_time.tzinfo) - payment_time).total_seconds()))
-                        
-                        if student['is_existing_student']:
-                            priority_score += 5000
-                        
-                        if student['has_sibling']:
-                            priority_score += 3000
-                        
-                        student_list.append({
-                            '이름': student['name'],
-                            '학년': student['grade'],
-                            '입금상태': student['payment_status'],
-                            '기존생': '✓' if student['is_existing_student'] else '',
-                            '형제': '✓' if student['has_sibling'] else '',
-                            '우선순위점수': priority_score,
-                            '시간우선순위': item['priority']
-                        })
-                    
-                    student_df = pd.DataFrame(student_list)
-                    student_df = student_df.sort_values('우선순위점수', ascending=False)
-                    student_df['배정순번'] = range(1, len(student_df) + 1)
-                    
-                    st.dataframe(
-                        student_df[['배정순번', '이름', '학년', '입금상태', '기존생', '형제', '우선순위점수']],
-                        use_container_width=True,
-                        hide_index=True
-                    )
-                else:
-                    st.info("해당 시간대에 신청한 학생이 없습니다.")
+            _schedule_fragment(supabase, df)
         else:
             st.info("시간표 데이터가 없습니다. 학생의 가용 시간을 먼저 등록해주세요.")
             
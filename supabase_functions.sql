@@ -0,0 +1,112 @@
+-- ============================================
+-- 예설라 일광원 관리 시스템 - Supabase SQL
+-- Supabase 대시보드 → SQL Editor에서 전체를 한 번에 실행
+-- (인덱스는 supabase_indexes.sql 참고)
+-- ============================================
+
+-- ============================================
+-- OCR 승인: 원서 기록 + 학생 등록 (단일 트랜잭션)
+-- ============================================
+CREATE OR REPLACE FUNCTION approve_ocr_application(p_ocr jsonb, p_student jsonb)
+RETURNS uuid
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_student_id uuid;
+BEGIN
+    -- 함수 본문은 하나의 트랜잭션으로 실행되므로 둘 중 하나라도 실패하면 모두 롤백됨
+    INSERT INTO ocr_applications (
+        image_url, ocr_raw_text, ocr_structured_data, blue_text_notes,
+        review_status, reviewed_by, reviewed_at
+    ) VALUES (
+        p_ocr->>'image_url',
+        p_ocr->>'ocr_raw_text',
+        p_ocr->'ocr_structured_data',
+        p_ocr->>'blue_text_notes',
+        p_ocr->>'review_status',
+        (p_ocr->>'reviewed_by')::uuid,
+        (p_ocr->>'reviewed_at')::timestamptz
+    );
+
+    INSERT INTO students (
+        name, grade, parent_phone, reading_habit, special_notes, created_by
+    ) VALUES (
+        p_student->>'name',
+        p_student->>'grade',
+        p_student->>'parent_phone',
+        p_student->>'reading_habit',
+        p_student->>'special_notes',
+        (p_student->>'created_by')::uuid
+    )
+    RETURNING id INTO v_student_id;
+
+    RETURN v_student_id;
+END;
+$$;
+
+-- ============================================
+-- 스마트 시간표: 학생 우선순위 점수
+-- 입금 선착순 > 기존생 > 형제 > 일반 선착순
+-- (now()를 사용하므로 generated column/인덱스로는 만들 수 없음)
+-- ============================================
+CREATE OR REPLACE FUNCTION student_priority_score(s students)
+RETURNS bigint
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        CASE WHEN s.payment_status = 'paid'
+             THEN 1000000 + COALESCE(10000 - trunc(EXTRACT(EPOCH FROM now() - s.payment_date))::bigint, 0)
+             ELSE 0 END
+        + CASE WHEN s.is_existing_student THEN 5000 ELSE 0 END
+        + CASE WHEN s.has_sibling THEN 3000 ELSE 0 END
+$$;
+
+-- ============================================
+-- 스마트 시간표: 시간대 요약 + 가용 학생 목록 (단일 조회)
+-- 학생 목록은 priority_score 내림차순, 동점이면 시간 우선순위(priority) 순
+-- 파라미터 타입은 available_times 컬럼 타입을 그대로 따름 (%TYPE은 생성 시점에 확정되므로
+-- 컬럼 타입을 바꾸면 이 함수를 다시 생성해야 함)
+-- ============================================
+CREATE OR REPLACE FUNCTION get_slot_with_students(
+    p_day available_times.day_of_week%TYPE,
+    p_time available_times.time_slot%TYPE
+)
+RETURNS jsonb
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'summary', (
+            SELECT to_jsonb(s)
+            FROM (
+                SELECT day_of_week, time_slot, applicant_count, should_highlight, student_names
+                FROM smart_schedule
+                WHERE day_of_week = p_day AND time_slot = p_time
+                LIMIT 1
+            ) s
+        ),
+        'students', COALESCE((
+            SELECT jsonb_agg(
+                jsonb_build_object(
+                    'student_id', a.student_id,
+                    'priority', a.priority,
+                    'priority_score', ps.score,
+                    'students', jsonb_build_object(
+                        'name', st.name,
+                        'grade', st.grade,
+                        'payment_status', st.payment_status,
+                        'is_existing_student', st.is_existing_student,
+                        'has_sibling', st.has_sibling
+                    )
+                )
+                ORDER BY ps.score DESC, a.priority
+            )
+            FROM available_times a
+            JOIN students st ON st.id = a.student_id
+            -- 점수는 이미 조인한 학생 행으로 한 번만 계산
+            CROSS JOIN LATERAL (SELECT student_priority_score(st) AS score) ps
+            WHERE a.day_of_week = p_day AND a.time_slot = p_time
+        ), '[]'::jsonb)
+    );
+$$;
@@ -0,0 +1,24 @@
+-- ============================================
+-- 예설라 일광원 관리 시스템 - Supabase 인덱스
+-- CREATE INDEX CONCURRENTLY는 트랜잭션 블록 안에서 실행할 수 없으므로
+-- SQL Editor에서 아래 문장을 하나씩 선택하여 따로 실행
+-- ============================================
+
+-- ============================================
+-- OCR 처리 이력: (created_at, id) 키셋 페이지네이션용 인덱스
+-- ============================================
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ocr_applications_created_at_id_desc_idx
+    ON ocr_applications (created_at DESC, id DESC);
+
+-- ============================================
+-- 가용 시간 조회용 인덱스 (요일/시간대 모두 동등 조건)
+-- students(id)는 기본 키 인덱스로 조인
+-- ============================================
+CREATE INDEX CONCURRENTLY IF NOT EXISTS available_times_day_time_idx
+    ON available_times (day_of_week, time_slot) INCLUDE (student_id, priority);
+
+-- ============================================
+-- 로그인 조회용 부분 인덱스 (활성 사용자만)
+-- ============================================
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS users_username_active_idx
+    ON users (username) WHERE is_active;
@@ -0,0 +1,13 @@
+"""
+사용자 계정 관리 헬퍼 (계정 생성/비밀번호 변경 전용)
+"""
+import bcrypt
+
+# bcrypt 비용 계수 (12 rounds ≈ 250ms/회)
+# 로그인 화면 등 매 재실행 경로에서는 호출하지 말 것
+BCRYPT_ROUNDS = 12
+
+
+def hash_password(password: str) -> str:
+    """비밀번호 해시화"""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode('utf-8')